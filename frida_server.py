@@ -5,310 +5,105 @@ os.environ['PYTHONIOENCODING'] = 'utf-8'
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
 
-from flask import Flask, request, jsonify, send_file, make_response
-from flask_swagger_ui import get_swaggerui_blueprint
-from openai import OpenAI
+import asyncio
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from cachetools import TTLCache
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.openapi.docs import get_swagger_ui_html
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import UploadFile
+from openai import AsyncOpenAI
+import diskcache
+import httpx
+import msgpack
+import numpy as np
+import orjson
 import base64
-import tempfile
+import re
+import secrets
 import time
-import threading
 import random
 
-app = Flask(__name__)
-
-# Enable CORS for all routes - this is crucial for WebGL builds
-@app.after_request
-def add_cors_headers(response):
-    response.headers.add('Access-Control-Allow-Origin', '*')  # Allow requests from any origin
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-    response.headers.add('Access-Control-Allow-Methods', 'GET,POST,OPTIONS')
-    # Handle preflight requests
-    if request.method == 'OPTIONS':
-        return response
-    return response
-
-# Add a route to handle preflight OPTIONS requests explicitly
-@app.route('/', defaults={'path': ''}, methods=['OPTIONS'])
-@app.route('/<path:path>', methods=['OPTIONS'])
-def handle_options(path):
-    response = make_response()
-    response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-    response.headers.add('Access-Control-Allow-Methods', 'GET,POST,OPTIONS')
-    return response
+
+async def warm_connection():
+    """Open the connection to OpenAI (TCP + TLS) with a cheap request.
+
+    Only an optimization, so a failure (e.g. a key without permission to
+    list models) doesn't stop the server from starting.
+    """
+    try:
+        await client.models.list()
+    except Exception as e:
+        print(f"Connection warm-up failed: {e!r}")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Warm the connection and pre-generate fillers before the first request
+    # is served
+    await asyncio.gather(warm_connection(), init_static_audio())
+    yield
+    await client.close()
+    executor.shutdown(wait=False)
+    if redis_client is not None:
+        await redis_client.aclose()
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson, which is much faster on the large
+    base64 audio strings most endpoints return."""
+
+    def render(self, content):
+        return orjson.dumps(content)
+
+
+class MsgPackResponse(Response):
+    """msgpack response, which carries audio as raw bytes instead of base64."""
+
+    media_type = "application/msgpack"
+
+    def render(self, content):
+        return msgpack.packb(content)
+
+
+# The built-in docs are replaced by the Swagger UI route below
+app = FastAPI(
+    lifespan=lifespan,
+    docs_url=None,
+    redoc_url=None,
+    default_response_class=ORJSONResponse,
+)
+
+# Enable CORS for all routes - this is crucial for WebGL builds. The
+# middleware answers preflight OPTIONS requests itself, without routing them
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # Allow requests from any origin
+    allow_headers=["Content-Type", "Authorization"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+)
 
 # Set up Swagger UI
 SWAGGER_URL = "/api/docs"  # URL for exposing Swagger UI
 API_URL = "/static/swagger.json"  # Our API url (can of course be a local resource)
 
-# Call factory function to create our blueprint
-swaggerui_blueprint = get_swaggerui_blueprint(
-    SWAGGER_URL,
-    API_URL,
-    config={"app_name": "Frida Kahlo Conversation API"},  # Swagger UI config overrides
-)
-
-# Register blueprint at URL
-app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 
-# Create directory for static files if it doesn't exist
-os.makedirs(
-    os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"), exist_ok=True
-)
+@app.get(SWAGGER_URL, include_in_schema=False)
+async def swagger_ui():
+    return get_swagger_ui_html(
+        openapi_url=API_URL, title="Frida Kahlo Conversation API"
+    )
 
-# Create a swagger.json file
-swagger_json = """
-{
-  "swagger": "2.0",
-  "info": {
-    "title": "Frida Kahlo Conversation API",
-    "description": "API for conversing with Frida Kahlo AI character",
-    "version": "1.0.0"
-  },
-  "host": "localhost:5001",
-  "basePath": "/",
-  "schemes": [
-    "http"
-  ],
-  "paths": {
-    "/start_session": {
-      "post": {
-        "summary": "Start a new conversation session",
-        "produces": ["application/json"],
-        "responses": {
-          "200": {
-            "description": "Session started successfully",
-            "schema": {
-              "type": "object",
-              "properties": {
-                "session_id": {"type": "string"},
-                "welcome_text": {"type": "string"},
-                "welcome_audio": {"type": "string"},
-                "estimated_duration": {"type": "number"}
-              }
-            }
-          }
-        }
-      }
-    },
-    "/transcribe": {
-      "post": {
-        "summary": "Transcribe audio to text",
-        "consumes": ["multipart/form-data"],
-        "parameters": [
-          {
-            "name": "audio",
-            "in": "formData",
-            "description": "Audio file to transcribe",
-            "required": true,
-            "type": "file"
-          }
-        ],
-        "responses": {
-          "200": {
-            "description": "Transcription successful",
-            "schema": {
-              "type": "object",
-              "properties": {
-                "text": {"type": "string"}
-              }
-            }
-          }
-        }
-      }
-    },
-    "/get_filler": {
-      "post": {
-        "summary": "Get a random filler statement",
-        "produces": ["application/json"],
-        "responses": {
-          "200": {
-            "description": "Filler retrieved successfully",
-            "schema": {
-              "type": "object",
-              "properties": {
-                "text": {"type": "string"},
-                "audio_base64": {"type": "string"},
-                "estimated_duration": {"type": "number"}
-              }
-            }
-          }
-        }
-      }
-    },
-    "/get_response": {
-      "post": {
-        "summary": "Start generating a response from Frida",
-        "consumes": ["application/json"],
-        "parameters": [
-          {
-            "name": "body",
-            "in": "body",
-            "required": true,
-            "schema": {
-              "type": "object",
-              "properties": {
-                "text": {"type": "string"},
-                "session_id": {"type": "string"}
-              },
-              "required": ["text", "session_id"]
-            }
-          }
-        ],
-        "responses": {
-          "200": {
-            "description": "Response generation started",
-            "schema": {
-              "type": "object",
-              "properties": {
-                "status": {"type": "string"}
-              }
-            }
-          }
-        }
-      }
-    },
-    "/check_response": {
-      "post": {
-        "summary": "Check if a response is ready",
-        "consumes": ["application/json"],
-        "parameters": [
-          {
-            "name": "body",
-            "in": "body",
-            "required": true,
-            "schema": {
-              "type": "object",
-              "properties": {
-                "session_id": {"type": "string"}
-              },
-              "required": ["session_id"]
-            }
-          }
-        ],
-        "responses": {
-          "200": {
-            "description": "Response status",
-            "schema": {
-              "type": "object",
-              "properties": {
-                "completed": {"type": "boolean"},
-                "status": {"type": "string"},
-                "text": {"type": "string"},
-                "audio_base64": {"type": "string"},
-                "duration": {"type": "number"},
-                "phoneme_data": {
-                  "type": "array",
-                  "items": {
-                    "type": "object",
-                    "properties": {
-                      "word": {"type": "string"},
-                      "start_time": {"type": "number"},
-                      "end_time": {"type": "number"}
-                    }
-                  }
-                }
-              }
-            }
-          }
-        }
-      }
-    },
-    "/end_session": {
-      "post": {
-        "summary": "End a conversation session",
-        "consumes": ["application/json"],
-        "parameters": [
-          {
-            "name": "body",
-            "in": "body",
-            "required": true,
-            "schema": {
-              "type": "object",
-              "properties": {
-                "session_id": {"type": "string"}
-              },
-              "required": ["session_id"]
-            }
-          }
-        ],
-        "responses": {
-          "200": {
-            "description": "Session ended successfully",
-            "schema": {
-              "type": "object",
-              "properties": {
-                "status": {"type": "string"}
-              }
-            }
-          }
-        }
-      }
-    },
-    "/get_audio": {
-      "get": {
-        "summary": "Download the most recent audio directly as MP3",
-        "parameters": [
-          {
-            "name": "session_id",
-            "in": "query",
-            "required": true,
-            "type": "string"
-          }
-        ],
-        "responses": {
-          "200": {
-            "description": "Audio retrieved successfully",
-            "schema": {
-              "type": "string"
-            }
-          },
-          "404": {
-            "description": "Audio not found"
-          }
-        }
-      }
-    },
-    "/get_response_audio": {
-      "post": {
-        "summary": "Alternative endpoint to get audio in WAV format",
-        "consumes": ["application/json"],
-        "parameters": [
-          {
-            "name": "session_id",
-            "in": "body",
-            "required": true,
-            "schema": {
-              "type": "string"
-            }
-          }
-        ],
-        "responses": {
-          "200": {
-            "description": "Audio URL retrieved successfully",
-            "schema": {
-              "type": "object",
-              "properties": {
-                "audio_url": {"type": "string"}
-              }
-            }
-          },
-          "404": {
-            "description": "Audio not found"
-          }
-        }
-      }
-    }
-  }
-}
-"""
 
-# Write swagger.json to static directory
-swagger_path = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)), "static", "swagger.json"
-)
-with open(swagger_path, "w") as f:
-    f.write(swagger_json)
+# Serve swagger.json (a source file, not generated) and other static assets
+static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
 # Get API key from environment variable
 api_key = os.environ.get("OPENAI_API_KEY")
@@ -323,8 +118,19 @@ if not api_key:
         "No API key found. Please set the OPENAI_API_KEY environment variable."
     )
 
-# Initialize the OpenAI client
-client = OpenAI(api_key=api_key)
+# Initialize the OpenAI client, shared by all handlers. The pool is sized for
+# many concurrent sessions and HTTP/2 multiplexes calls over few connections
+client = AsyncOpenAI(
+    api_key=api_key,
+    http_client=httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=200,
+            max_keepalive_connections=100,
+            keepalive_expiry=300,  # Keep idle connections warm between turns
+        ),
+    ),
+)
 
 # Frida Kahlo prompt with instructions for shorter responses
 FRIDA_PROMPT = """You are Frida Kahlo, the Mexican painter known for your bold art and emotional insight. 
@@ -349,296 +155,890 @@ FILLER_STATEMENTS = [
     "Un momento, por favor...",
 ]
 
-# Store conversation sessions and response generation threads
-sessions = {}
-response_threads = {}
-filler_audio_cache = {}
+# Store conversation sessions and response generation tasks. Entries expire
+# so sessions abandoned without /end_session don't pin history and audio
+SESSION_TTL = 3600
+sessions = TTLCache(maxsize=10_000, ttl=SESSION_TTL)
+RESPONSE_TTL = 600
+RESPONSE_HEARTBEAT = 0.5  # Seconds between /response_stream processing events
+response_tasks = TTLCache(maxsize=10_000, ttl=RESPONSE_TTL)
+running_tasks = set()  # Strong references until done; the caches may evict
+
+# At most this many responses call OpenAI at once; the rest wait their turn
+# instead of bursting into rate limits
+MAX_CONCURRENT_RESPONSES = 64
+response_slots = asyncio.Semaphore(MAX_CONCURRENT_RESPONSES)
+
+# With REDIS_URL set, session history and finished responses live in Redis
+# instead of the process, so they survive restarts and are shared by every
+# worker and host
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    import redis.asyncio as redis
+
+    redis_client = redis.Redis.from_url(REDIS_URL)
+else:
+    redis_client = None
+
+# Raw audio handed out by reference to clients that request ?audio=url. With
+# Redis it is stored there, so any worker can serve the link
+AUDIO_URL_TTL = 300
+audio_store = TTLCache(maxsize=10_000, ttl=AUDIO_URL_TTL)
 
 # Model configurations
-CHAT_MODEL = "gpt-3.5-turbo"  # Faster than gpt-4
+CHAT_MODEL = "gpt-4o-mini"  # Faster first token and cheaper than gpt-3.5-turbo
 TTS_MODEL = "tts-1"
 TTS_VOICE = "shimmer"
 TRANSCRIPTION_MODEL = "whisper-1"
+EMBED_MODEL = "text-embedding-3-small"
+
+# Only the most recent messages (four exchanges) are sent with each turn, so
+# prompt size and prefill latency stay flat however long a session runs
+CHAT_HISTORY_WINDOW = 8
+
+# Semantic response cache: replies are reused for questions whose embedding
+# has a cosine similarity above the threshold with an earlier question asked
+# after the same history, so follow-ups never get another conversation's reply.
+# Later turns follow a reply unique to their session and can never match, so
+# only a session's first question (after at most the welcome) is embedded.
+# The lookup is skipped if the embedding takes longer than the timeout
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_SIZE = 1024
+EMBED_TIMEOUT = 1.0
+cache_vecs = np.empty((0, 1536), dtype=np.float32)  # Unit-normalized rows
+cache_contexts = np.empty(0, dtype="S64")  # History hash of each row
+cache_entries = []  # (text, audio) pairs parallel to cache_vecs
+
+# Exact chat cache: LRU of (text, audio) keyed by a hash of the full prompt
+CHAT_CACHE_SIZE = 1024
+chat_cache = OrderedDict()
+
+# A sentence is complete once its terminator is followed by whitespace
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+# Uploads that are not WAV, or larger than this, are downsampled to 16 kHz
+# mono (what Whisper uses internally) with silence trimmed before upload
+PREPROCESS_MIN_BYTES = 256 * 1024
+FFMPEG_PREPROCESS_ARGS = [
+    "ffmpeg", "-y", "-i", "pipe:0",
+    "-af", "silenceremove=start_periods=1:start_threshold=-30dB"
+    ":stop_periods=-1:stop_duration=0.5:stop_threshold=-30dB",
+    "-ar", "16000", "-ac", "1", "-acodec", "pcm_s16le", "-f", "wav", "pipe:1",
+]
+
+WELCOME_TEXT = "Hola! I am Frida Kahlo. I am here to share my thoughts on art, life, and passion. What would you like to talk about?"
+
+# Filler and welcome audio with its base64, keyed by text and pre-generated
+# at startup
+static_audio = {}
+
+# Persistent TTS cache shared by fillers, the welcome and responses, so
+# audio survives restarts instead of being re-billed on every boot. A small
+# in-memory LRU in front of it serves hot clips without touching SQLite
+TTS_CACHE_TTL = 7 * 86400  # One week
+tts_cache = diskcache.Cache(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_cache"),
+    size_limit=512 * 1024 * 1024,
+)
+TTS_MEMORY_CACHE_SIZE = 256
+tts_memory_cache = OrderedDict()
+
+# Persistent pool for blocking work such as the SQLite cache I/O, so it never
+# stalls the event loop that every session shares
+executor = ThreadPoolExecutor(max_workers=16)
+
+
+def tts_cache_key(text):
+    """Key TTS audio by everything that affects the synthesized speech."""
+    return hashlib.sha256(f"{TTS_MODEL}|{TTS_VOICE}|{text}".encode()).hexdigest()
+
+
+async def run_blocking(func, *args):
+    """Run a blocking call on the worker pool and await its result."""
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+def remember_audio(key, audio):
+    """Put audio in the in-memory LRU tier, evicting the oldest clip."""
+    tts_memory_cache[key] = audio
+    tts_memory_cache.move_to_end(key)
+    if len(tts_memory_cache) > TTS_MEMORY_CACHE_SIZE:
+        tts_memory_cache.popitem(last=False)
 
 
-def generate_audio(text, cache_key=None):
-    """Generate audio from text using OpenAI TTS."""
-    # Check cache if a key is provided
-    if cache_key and cache_key in filler_audio_cache:
-        return filler_audio_cache[cache_key]
+async def lookup_audio(key):
+    """Return cached TTS audio from the memory or disk tier, or None."""
+    audio = tts_memory_cache.get(key)
+    if audio is None:
+        audio = await run_blocking(tts_cache.get, key)
+    if audio is not None:
+        remember_audio(key, audio)
+    return audio
+
+
+async def store_audio(key, audio):
+    """Put TTS audio in both cache tiers."""
+    remember_audio(key, audio)
+    await run_blocking(tts_cache.set, key, audio, TTS_CACHE_TTL)
+
+
+async def generate_audio(text):
+    """Generate audio from text using OpenAI TTS, reusing cached audio."""
+    key = tts_cache_key(text)
+    audio = await lookup_audio(key)
+    if audio is not None:
+        return audio
 
     # Generate speech
-    speech_response = client.audio.speech.create(
+    speech_response = await client.audio.speech.create(
         model=TTS_MODEL, voice=TTS_VOICE, input=text
     )
 
-    # Save to cache if needed
-    if cache_key:
-        filler_audio_cache[cache_key] = speech_response.content
-
+    await store_audio(key, speech_response.content)
     return speech_response.content
 
 
+async def stream_generated_audio(text):
+    """Yield TTS audio chunks as OpenAI produces them, caching the whole clip."""
+    chunks = []
+    async with client.audio.speech.with_streaming_response.create(
+        model=TTS_MODEL, voice=TTS_VOICE, input=text, response_format="mp3"
+    ) as response:
+        async for chunk in response.iter_bytes(4096):
+            chunks.append(chunk)
+            yield chunk
+    await store_audio(tts_cache_key(text), b"".join(chunks))
+
+
 # Pre-generate filler statements
-def init_filler_statements():
-    for statement in FILLER_STATEMENTS:
-        generate_audio(statement, cache_key=statement)
-    print(f"Pre-generated {len(FILLER_STATEMENTS)} filler statements")
+async def init_static_audio():
+    # Synthesize everything concurrently so startup waits for one round-trip
+    texts = [WELCOME_TEXT, *FILLER_STATEMENTS]
+    audios = await asyncio.gather(*(generate_audio(text) for text in texts))
+    # The audio never changes, so encode it once instead of on every request
+    for text, audio in zip(texts, audios):
+        static_audio[text] = (audio, base64.b64encode(audio).decode("ascii"))
+    print(f"Pre-generated {len(FILLER_STATEMENTS)} filler statements and the welcome")
+
+
+def wants_audio_url(request):
+    """Whether the client asked for audio by URL instead of inline base64."""
+    return request.query_params.get("audio") == "url"
+
+
+def wants_msgpack(request):
+    """Whether the client accepts msgpack responses."""
+    return "application/msgpack" in request.headers.get("accept", "")
+
+
+def audio_mode(request):
+    """Return how a response should carry audio: "url", "raw" or "base64"."""
+    if wants_audio_url(request):
+        return "url"
+    if wants_msgpack(request):
+        return "raw"
+    return "base64"
+
+
+def sse_audio_mode(request):
+    """Return the audio mode for an event stream, which is text, so audio is
+    never sent raw."""
+    return "url" if wants_audio_url(request) else "base64"
+
+
+async def audio_fields(key, audio, mode, audio_b64=None):
+    """Return the audio part of a response payload.
+
+    In "base64" mode the audio is inline under ``key`` (``audio_b64`` if
+    already encoded). "url" gives an ``audio_url`` serving the raw MP3 and
+    "raw" puts the bytes under ``audio`` for msgpack responses; both avoid
+    base64's size and encoding overhead.
+    """
+    if mode == "url":
+        token = secrets.token_urlsafe(16)
+        if redis_client is None:
+            audio_store[token] = audio
+        else:
+            await redis_client.set(audio_key(token), audio, ex=AUDIO_URL_TTL)
+        return {"audio_url": f"/get_audio/{token}"}
+    if mode == "raw":
+        return {"audio": audio}
+    return {key: audio_b64 or base64.b64encode(audio).decode("ascii")}
+
+
+def negotiate(request, payload):
+    """Return ``payload`` as msgpack if the client accepts it, else as JSON."""
+    if wants_msgpack(request):
+        return MsgPackResponse(payload)
+    return payload
+
+
+async def read_json(request):
+    """Parse a request's JSON body with orjson rather than the stdlib decoder.
+
+    Returns None if the body is empty, malformed or not a JSON object.
+    """
+    try:
+        data = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def invalid_body():
+    return ORJSONResponse({"error": "Invalid JSON body"}, status_code=400)
+
+
+def session_key(session_id):
+    return f"sess:{session_id}"
+
+
+def response_key(session_id):
+    return f"resp:{session_id}"
+
+
+def audio_key(token):
+    return f"audio:{token}"
+
+
+async def load_history(session_id, limit=None):
+    """Return a session's conversation history as a list of messages.
+
+    With ``limit``, only the most recent ``limit`` messages are returned.
+    """
+    start = -limit if limit else 0
+    if redis_client is None:
+        return sessions.get(session_id, [])[start:]
+    raw = await redis_client.lrange(session_key(session_id), start, -1)
+    return [orjson.loads(message) for message in raw]
+
+
+async def append_history(session_id, *messages):
+    """Append messages to a session's history, creating it if needed."""
+    if redis_client is None:
+        # Reassigning also refreshes the session's TTL
+        sessions[session_id] = sessions.get(session_id, []) + list(messages)
+        return
+    # One round trip for the append and the TTL refresh
+    key = session_key(session_id)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.rpush(key, *(orjson.dumps(message) for message in messages))
+        pipe.expire(key, SESSION_TTL)
+        await pipe.execute()
 
 
-# Initialize fillers
-init_filler_statements()
+async def session_exists(session_id):
+    """Whether a session has any history."""
+    if redis_client is None:
+        return session_id in sessions
+    return await redis_client.exists(session_key(session_id)) > 0
 
 
-@app.route("/start_session", methods=["POST"])
-def start_session():
+async def delete_session(session_id):
+    """Delete a session's history; returns whether the session existed."""
+    if redis_client is None:
+        return sessions.pop(session_id, None) is not None
+    deleted = await redis_client.delete(
+        session_key(session_id), response_key(session_id)
+    )
+    return deleted > 0
+
+
+@app.post("/start_session")
+async def start_session(request: Request):
     """Start a new conversation session."""
     session_id = str(int(time.time()))
-    sessions[session_id] = []
 
-    # Generate welcome message
-    welcome_message = "Hola! I am Frida Kahlo. I am here to share my thoughts on art, life, and passion. What would you like to talk about?"
-    welcome_audio = generate_audio(welcome_message)
+    # The welcome audio is pre-generated at startup
+    welcome_audio, welcome_b64 = static_audio[WELCOME_TEXT]
 
-    # Add to session history
-    sessions[session_id].append({"role": "assistant", "content": welcome_message})
-
-    # Encode audio to base64
-    welcome_audio_b64 = base64.b64encode(welcome_audio).decode("utf-8")
-
-    return jsonify(
-        {
-            "session_id": session_id,
-            "welcome_text": welcome_message,
-            "welcome_audio": welcome_audio_b64,
-            "estimated_duration": len(welcome_message.split())
-            * 0.3,  # Rough duration estimate
-        }
-    )
+    # Start the session history with the welcome
+    await delete_session(session_id)
+    await append_history(session_id, {"role": "assistant", "content": WELCOME_TEXT})
 
+    return negotiate(request, {
+        "session_id": session_id,
+        "welcome_text": WELCOME_TEXT,
+        **await audio_fields(
+            "welcome_audio", welcome_audio, audio_mode(request), welcome_b64
+        ),
+        "estimated_duration": len(WELCOME_TEXT.split())
+        * 0.3,  # Rough duration estimate
+    })
+
+
+async def preprocess_audio(audio_bytes):
+    """Resample audio to 16 kHz mono WAV and trim silence with ffmpeg.
+
+    Returns None if ffmpeg is unavailable or fails, so the caller can fall
+    back to the original upload.
+    """
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *FFMPEG_PREPROCESS_ARGS,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except FileNotFoundError:
+        return None
 
-@app.route("/transcribe", methods=["POST"])
-def transcribe_audio():
+    processed, _ = await proc.communicate(audio_bytes)
+    if proc.returncode != 0 or not processed:
+        return None
+    return processed
+
+
+@app.post("/transcribe")
+async def transcribe_audio(request: Request):
     """Transcribe audio sent from Unity."""
-    # Check if request has the audio file
-    if "audio" not in request.files:
-        return jsonify({"error": "No audio file provided"}), 400
+    form = await request.form()
 
-    audio_file = request.files["audio"]
+    # Check if request has the audio file (not a plain form field)
+    audio_file = form.get("audio")
+    if not isinstance(audio_file, UploadFile):
+        return ORJSONResponse({"error": "No audio file provided"}, status_code=400)
 
-    # Save the audio to a temporary file
-    temp_audio = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-    audio_file.save(temp_audio.name)
-    temp_audio.close()
+    audio_bytes = await audio_file.read()
+    filename = audio_file.filename or "audio.wav"
+    content_type = audio_file.content_type
 
-    try:
-        # Transcribe the audio
-        with open(temp_audio.name, "rb") as file:
-            transcript = client.audio.transcriptions.create(
-                model=TRANSCRIPTION_MODEL, file=file
-            )
+    # Shrink the payload and the billed seconds unless it is already small
+    if content_type != "audio/wav" or len(audio_bytes) > PREPROCESS_MIN_BYTES:
+        processed = await preprocess_audio(audio_bytes)
+        if processed:
+            filename, audio_bytes, content_type = "audio.wav", processed, "audio/wav"
 
-        return jsonify({"text": transcript.text})
+    transcript = await client.audio.transcriptions.create(
+        model=TRANSCRIPTION_MODEL, file=(filename, audio_bytes, content_type)
+    )
 
-    finally:
-        # Clean up
-        if os.path.exists(temp_audio.name):
-            os.remove(temp_audio.name)
+    return {"text": transcript.text}
 
 
-@app.route("/get_filler", methods=["POST"])
-def get_filler():
+@app.post("/get_filler")
+async def get_filler(request: Request):
     """Get a random filler statement for immediate feedback."""
     # Pick a random filler
     filler = random.choice(FILLER_STATEMENTS)
 
-    # Get pre-generated audio from cache
-    filler_audio = filler_audio_cache.get(filler)
-    if not filler_audio:
-        # Generate if not cached
-        filler_audio = generate_audio(filler)
-
-    # Convert to base64
-    audio_b64 = base64.b64encode(filler_audio).decode("utf-8")
-
-    return jsonify(
-        {
-            "text": filler,
-            "audio_base64": audio_b64,
-            "estimated_duration": len(filler.split()) * 0.3,  # Rough duration estimate
-        }
+    # Get pre-generated audio and its base64
+    audio, audio_b64 = static_audio[filler]
+
+    return negotiate(request, {
+        "text": filler,
+        **await audio_fields(
+            "audio_base64", audio, audio_mode(request), audio_b64
+        ),
+        "estimated_duration": len(filler.split()) * 0.3,  # Rough duration estimate
+    })
+
+
+async def embed_text(text):
+    """Return the unit-normalized embedding of a text."""
+    response = await client.embeddings.create(model=EMBED_MODEL, input=text)
+    vec = np.asarray(response.data[0].embedding, dtype=np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+async def embed_query(text):
+    """Return the embedding of a question, or None if it is not available.
+
+    The semantic cache is only an optimization, so a slow or failed embedding
+    call falls back to generating the reply.
+    """
+    try:
+        return await asyncio.wait_for(embed_text(text), EMBED_TIMEOUT)
+    except Exception as e:
+        print(f"Skipping semantic cache lookup: {e!r}")
+        return None
+
+
+def history_hash(messages):
+    """Hash the history a question is asked after, as a cache context."""
+    return hashlib.sha256(
+        orjson.dumps(messages, option=orjson.OPT_SORT_KEYS)
+    ).hexdigest().encode("ascii")
+
+
+def semantic_cache_lookup(vec, context):
+    """Return the cached (text, audio) of the most similar question asked
+    after the same history (``context``), if any."""
+    if not cache_entries:
+        return None
+    # Rows are normalized, so one matrix-vector product gives every cosine
+    sims = np.where(cache_contexts == context, cache_vecs @ vec, -1.0)
+    best = int(sims.argmax())
+    if sims[best] > SEMANTIC_CACHE_THRESHOLD:
+        return cache_entries[best]
+    return None
+
+
+def semantic_cache_store(vec, context, entry):
+    """Add a reply to the semantic cache, dropping the oldest past the limit."""
+    global cache_vecs, cache_contexts
+    cache_vecs = np.vstack((cache_vecs, vec))[-SEMANTIC_CACHE_SIZE:]
+    cache_contexts = np.append(cache_contexts, context)[-SEMANTIC_CACHE_SIZE:]
+    cache_entries.append(entry)
+    del cache_entries[:-SEMANTIC_CACHE_SIZE]
+
+
+async def synthesize_reply(messages, events=None):
+    """Stream a chat reply and synthesize its speech sentence by sentence.
+
+    If an ``events`` queue is given, ``("delta", text)`` items are put on it
+    as tokens arrive and ``("sentence", text, audio)`` items, in order, as
+    soon as each sentence's speech is ready.
+    """
+    stream = await client.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=messages,
+        max_tokens=90,  # 2-3 sentence replies rarely need more than ~80 tokens
+        stop=["\n\n"],
+        temperature=0,  # Deterministic, so identical prompts can be cached
+        stream=True,
     )
 
+    async def speak(sentence, previous):
+        audio = await generate_audio(sentence)
+        if previous is not None:
+            await previous  # Publish clips in sentence order
+        if events is not None:
+            events.put_nowait(("sentence", sentence, audio))
+        return audio
+
+    # Start TTS for each sentence as soon as it is complete, so speech for
+    # the first sentence is synthesized while the rest is still generated
+    parts = []
+    pending = ""
+    tts_tasks = []
 
-def generate_response_thread(user_text, session_id, result_dict):
-    """Background thread to generate Frida's response."""
-    conversation_history = sessions.get(session_id, [])
+    def start_speaking(sentence):
+        previous = tts_tasks[-1] if tts_tasks else None
+        tts_tasks.append(asyncio.create_task(speak(sentence, previous)))
+
+    try:
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            parts.append(delta)
+            if events is not None:
+                events.put_nowait(("delta", delta))
+            *sentences, pending = SENTENCE_BOUNDARY.split(pending + delta)
+            for sentence in sentences:
+                start_speaking(sentence)
+        if pending.strip():
+            start_speaking(pending.strip())
+
+        # MP3 frames can be concatenated as-is, so the sentence clips play as one
+        speech_audio = b"".join(await asyncio.gather(*tts_tasks))
+    except BaseException:
+        # Cancelled (e.g. by /end_session) or failed: drop pending TTS calls
+        for task in tts_tasks:
+            task.cancel()
+        raise
+
+    return "".join(parts).strip(), speech_audio
+
+
+async def generate_response(user_text, session_id, events=None):
+    """Background task to generate Frida's response.
+
+    Returns a ``(text, audio)`` tuple; the task object itself tracks completion.
+    Progress of freshly generated replies goes to the optional ``events``
+    queue (see ``synthesize_reply``).
+    """
+    # The full history is kept, but only the window is fetched and sent
+    conversation_history = await load_history(session_id, CHAT_HISTORY_WINDOW)
 
-    # Generate Frida's response
     messages = [{"role": "system", "content": FRIDA_PROMPT}]
     messages.extend(conversation_history)
     messages.append({"role": "user", "content": user_text})
 
-    response = client.chat.completions.create(
-        model=CHAT_MODEL, messages=messages, max_tokens=150
+    # Identical prompts replay the stored reply without any OpenAI call
+    key = hashlib.sha256(
+        orjson.dumps(messages, option=orjson.OPT_SORT_KEYS)
+    ).hexdigest()
+    if key in chat_cache:
+        chat_cache.move_to_end(key)
+        frida_response, speech_audio = chat_cache[key]
+    else:
+        async with response_slots:
+            # Near-duplicate questions asked after the same history reuse an
+            # earlier reply without chat or TTS
+            context = history_hash(conversation_history)
+            query_vec = None
+            if len(conversation_history) <= 1:
+                query_vec = await embed_query(user_text)
+            cached = None
+            if query_vec is not None:
+                cached = semantic_cache_lookup(query_vec, context)
+            if cached is not None:
+                frida_response, speech_audio = cached
+            else:
+                # Generate Frida's response
+                frida_response, speech_audio = await synthesize_reply(
+                    messages, events
+                )
+                if query_vec is not None:
+                    semantic_cache_store(
+                        query_vec, context, (frida_response, speech_audio)
+                    )
+
+        chat_cache[key] = (frida_response, speech_audio)
+        if len(chat_cache) > CHAT_CACHE_SIZE:
+            chat_cache.popitem(last=False)
+
+    # Don't recreate a session that was ended while the reply was generated
+    # (possibly on another worker)
+    if conversation_history and not await session_exists(session_id):
+        return frida_response, speech_audio
+
+    # Add to session history
+    await append_history(
+        session_id,
+        {"role": "user", "content": user_text},
+        {"role": "assistant", "content": frida_response},
     )
 
-    frida_response = response.choices[0].message.content
+    return frida_response, speech_audio
 
-    # Add to session history
-    conversation_history.append({"role": "user", "content": user_text})
-    conversation_history.append({"role": "assistant", "content": frida_response})
-    sessions[session_id] = conversation_history
 
-    # Generate speech
-    speech_audio = generate_audio(frida_response)
+async def publish_response(session_id, coro):
+    """Await a response coroutine, mirroring its state to a Redis hash.
 
-    # Update result dictionary
-    result_dict["text"] = frida_response
-    result_dict["audio"] = speech_audio
-    result_dict["completed"] = True
+    This lets any worker answer ``/check_response`` and ``/get_audio`` for a
+    response generated by another one.
+    """
+    if redis_client is None:
+        return await coro
 
+    key = response_key(session_id)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(key)
+        pipe.hset(key, "completed", 0)
+        pipe.expire(key, RESPONSE_TTL)
+        await pipe.execute()
 
-@app.route("/get_response", methods=["POST"])
-def get_response():
+    try:
+        frida_response, speech_audio = await coro
+    except BaseException:
+        await redis_client.delete(key)
+        raise
+
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(
+            key, mapping={"completed": 1, "text": frida_response, "audio": speech_audio}
+        )
+        pipe.expire(key, RESPONSE_TTL)
+        await pipe.execute()
+    return frida_response, speech_audio
+
+
+def log_response_failure(task):
+    """Log why a response task failed; clients only see a generic error."""
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Response generation failed: {task.exception()!r}")
+
+
+def start_response_task(session_id, coro):
+    """Run a response coroutine in the background as the session's task."""
+    task = asyncio.create_task(publish_response(session_id, coro))
+    running_tasks.add(task)
+    task.add_done_callback(running_tasks.discard)
+    task.add_done_callback(log_response_failure)
+    # A task cancelled before it awaited the coroutine never started it
+    task.add_done_callback(lambda _: coro.close())
+    response_tasks[session_id] = task
+    return task
+
+
+async def get_response_state(session_id):
+    """Return ``(status, result)`` for a session's latest response.
+
+    ``status`` is None if there is no response, otherwise "processing",
+    "failed" or "completed"; ``result`` is ``(text, audio)`` once completed.
+    Responses started by another worker are looked up in Redis.
+    """
+    task = response_tasks.get(session_id)
+    if task is not None:
+        if not task.done():
+            return "processing", None
+        if task.cancelled() or task.exception():
+            return "failed", None
+        return "completed", task.result()
+
+    if redis_client is None:
+        return None, None
+    state = await redis_client.hgetall(response_key(session_id))
+    if not state:
+        return None, None
+    if state[b"completed"] != b"1":
+        return "processing", None
+    return "completed", (state[b"text"].decode("utf-8"), state[b"audio"])
+
+
+async def build_response_payload(frida_response, speech_audio, mode="base64"):
+    """Build the completed-response payload with audio and SALSA timing data.
+
+    ``mode`` is an ``audio_fields`` mode.
+    """
+    # Calculate phoneme and timing data for SALSA
+    words = frida_response.split()
+    estimated_duration = len(words) * 0.3  # Rough estimate: 0.3 seconds per word
+
+    # Generate simplified phoneme timing data for SALSA
+    # In a real production system, you would use a proper phoneme extraction library
+    # Rough estimate: 75ms per character, with a small gap between words
+    durations = np.fromiter(map(len, words), dtype=np.float64, count=len(words)) * 0.075
+    starts = np.concatenate(([0.0], np.cumsum(durations[:-1] + 0.1)))
+    ends = starts + durations
+    phoneme_data = [
+        {"word": word, "start_time": start, "end_time": end}
+        for word, start, end in zip(words, starts.tolist(), ends.tolist())
+    ]
+
+    return {
+        "completed": True,
+        "text": frida_response,
+        **await audio_fields("audio_base64", speech_audio, mode),
+        "duration": estimated_duration,
+        "phoneme_data": phoneme_data,
+    }
+
+
+@app.post("/get_response")
+async def get_response(request: Request):
     """Generate a response from Frida and return as speech."""
-    data = request.json
+    data = await read_json(request)
 
     if not data or "text" not in data:
-        return jsonify({"error": "No text provided"}), 400
+        return ORJSONResponse({"error": "No text provided"}, status_code=400)
 
     user_text = data["text"]
     session_id = data.get("session_id", "default")
 
-    # Get or create conversation history
-    if session_id not in sessions:
-        sessions[session_id] = []
-
-    # Start response generation in background
-    result_dict = {"text": None, "audio": None, "completed": False}
-    thread = threading.Thread(
-        target=generate_response_thread, args=(user_text, session_id, result_dict)
-    )
-    thread.daemon = True
-    thread.start()
-
-    # Store the thread and result
-    response_threads[session_id] = (thread, result_dict)
+    # Start response generation in background; the event loop interleaves
+    # the OpenAI round-trips of every session instead of parking a thread
+    start_response_task(session_id, generate_response(user_text, session_id))
 
-    return jsonify({"status": "processing"})
+    return {"status": "processing"}
 
 
-@app.route("/check_response", methods=["POST"])
-def check_response():
+@app.post("/check_response")
+async def check_response(request: Request):
     """Check if a response is ready."""
-    data = request.json
+    data = await read_json(request)
+    if data is None:
+        return invalid_body()
     session_id = data.get("session_id", "default")
 
-    # Check if thread exists
-    if session_id not in response_threads:
-        return jsonify({"error": "No response being generated for this session"}), 404
+    status, result = await get_response_state(session_id)
 
-    thread, result_dict = response_threads[session_id]
+    # Check if a response exists
+    if status is None:
+        return ORJSONResponse(
+            {"error": "No response being generated for this session"},
+            status_code=404,
+        )
 
     # Check if response is ready
-    if not result_dict["completed"]:
-        return jsonify({"status": "processing", "completed": False})
+    if status == "processing":
+        return negotiate(request, {"status": "processing", "completed": False})
+
+    # Finished responses stay available for /get_audio until their TTL expires
+    if status == "failed":
+        return ORJSONResponse({"error": "Response generation failed"}, status_code=500)
 
     # Response is ready
-    frida_response = result_dict["text"]
-    speech_audio = result_dict["audio"]
+    payload = await build_response_payload(*result, audio_mode(request))
+    return negotiate(request, payload)
+
+
+def sse_event(payload):
+    """Encode a payload as one Server-Sent Events message."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+@app.get("/stream_response")
+async def stream_response(
+    request: Request, text: str, session_id: str = "default"
+):
+    """Stream Frida's response as Server-Sent Events.
+
+    Emits ``{"delta": ...}`` events as chat tokens arrive and a
+    ``{"sentence": ..., "audio_base64": ...}`` event as soon as each
+    sentence's speech is ready, so playback can start with the first
+    sentence. The last event has the same payload as a completed
+    ``/check_response``; its audio covers the whole reply, including any
+    sentence clips already sent. Cached replies skip straight to it.
+    """
+    mode = sse_audio_mode(request)
+    events = asyncio.Queue()
+    task = start_response_task(
+        session_id, generate_response(text, session_id, events)
+    )
+    # End the progress events however the task finishes, even if it was
+    # cancelled (e.g. by /end_session) before generation started
+    task.add_done_callback(lambda _: events.put_nowait(None))
+
+    async def stream():
+        while (event := await events.get()) is not None:
+            if event[0] == "delta":
+                payload = {"delta": event[1]}
+            else:
+                _, sentence, audio = event
+                payload = {
+                    "sentence": sentence,
+                    **await audio_fields("audio_base64", audio, mode),
+                }
+            yield sse_event(payload)
+        if task.cancelled() or task.exception():
+            payload = {"error": "Response generation failed"}
+        else:
+            payload = await build_response_payload(*task.result(), mode)
+        yield sse_event(payload)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@app.get("/response_stream")
+async def response_stream(request: Request, session_id: str = "default"):
+    """Push the state of a response started with ``/get_response`` as SSE.
+
+    Sends a processing heartbeat about every half second, then the completed
+    ``/check_response`` payload as soon as the reply is ready, so clients
+    don't have to poll.
+    """
+    mode = sse_audio_mode(request)
+
+    async def stream():
+        while True:
+            status, result = await get_response_state(session_id)
+            if status == "processing":
+                yield sse_event({"status": "processing", "completed": False})
+                # Wake as soon as a local task finishes; poll remote state
+                task = response_tasks.get(session_id)
+                if task is not None:
+                    await asyncio.wait({task}, timeout=RESPONSE_HEARTBEAT)
+                else:
+                    await asyncio.sleep(RESPONSE_HEARTBEAT)
+                continue
+
+            if status is None:
+                payload = {"error": "No response being generated for this session"}
+            elif status == "failed":
+                payload = {"error": "Response generation failed"}
+            else:
+                payload = await build_response_payload(*result, mode)
+            yield sse_event(payload)
+            return
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@app.post("/end_session")
+async def end_session(request: Request):
+    """End a conversation session."""
+    data = await read_json(request)
+    if data is None:
+        return invalid_body()
+    session_id = data.get("session_id")
 
-    # Encode audio to base64
-    audio_data = base64.b64encode(speech_audio).decode("utf-8")
+    if session_id and await delete_session(session_id):
+        # Also stop any reply still being generated, freeing its OpenAI calls
+        task = response_tasks.pop(session_id, None)
+        if task is not None:
+            task.cancel()
+        return {"status": "Session ended successfully"}
 
-    # Calculate phoneme and timing data for SALSA
-    words = frida_response.split()
-    estimated_duration = len(words) * 0.3  # Rough estimate: 0.3 seconds per word
+    return ORJSONResponse({"error": "Session not found"}, status_code=404)
 
-    # Generate simplified phoneme timing data for SALSA
-    # In a real production system, you would use a proper phoneme extraction library
-    phoneme_data = []
-    current_time = 0.0
-    for word in words:
-        word_duration = len(word) * 0.075  # Rough estimate: 75ms per character
-        phoneme_data.append(
-            {
-                "word": word,
-                "start_time": current_time,
-                "end_time": current_time + word_duration,
-            }
+
+@app.get("/get_audio")
+async def get_audio(session_id: str = None):
+    """Download the most recent audio directly as MP3."""
+    status, result = None, None
+    if session_id:
+        status, result = await get_response_state(session_id)
+    if status is None:
+        return ORJSONResponse(
+            {"error": "No audio available for this session"}, status_code=404
         )
-        current_time += word_duration + 0.1  # Add a small gap between words
-
-    # Clean up
-    del response_threads[session_id]
-
-    return jsonify(
-        {
-            "completed": True,
-            "text": frida_response,
-            "audio_base64": audio_data,
-            "duration": estimated_duration,
-            "phoneme_data": phoneme_data,
-        }
+
+    # Get the audio from the response
+    if status != "completed" or not result[1]:
+        return ORJSONResponse(
+            {"error": "Audio not ready or unavailable"}, status_code=404
+        )
+
+    # Create a response with MP3 data
+    return Response(
+        result[1],
+        media_type="audio/mpeg",
+        headers={"Content-Disposition": 'attachment; filename="frida_response.mp3"'},
     )
 
 
-@app.route("/end_session", methods=["POST"])
-def end_session():
-    """End a conversation session."""
-    data = request.json
-    session_id = data.get("session_id")
+@app.post("/stream_audio")
+async def stream_audio(request: Request):
+    """Stream speech for a text as MP3 while it is still being synthesized."""
+    data = await read_json(request)
 
-    if session_id and session_id in sessions:
-        del sessions[session_id]
-        # Also clean up any pending threads
-        if session_id in response_threads:
-            del response_threads[session_id]
-        return jsonify({"status": "Session ended successfully"})
+    if not data or "text" not in data:
+        return ORJSONResponse({"error": "No text provided"}, status_code=400)
 
-    return jsonify({"error": "Session not found"}), 404
+    text = data["text"]
 
+    # Cached audio is complete already, so send it in one piece
+    audio = await lookup_audio(tts_cache_key(text))
+    if audio is not None:
+        return Response(audio, media_type="audio/mpeg")
+
+    return StreamingResponse(stream_generated_audio(text), media_type="audio/mpeg")
 
-@app.route("/get_audio", methods=["GET"])
-def get_audio():
-    """Download the most recent audio directly as MP3."""
-    session_id = request.args.get('session_id')
-    
-    if not session_id or session_id not in response_threads:
-        return jsonify({"error": "No audio available for this session"}), 404
-    
-    # Get the audio from the response
-    _, result_dict = response_threads[session_id]
-    if not result_dict["completed"] or not result_dict["audio"]:
-        return jsonify({"error": "Audio not ready or unavailable"}), 404
-    
-    # Create a response with MP3 data
-    response = make_response(result_dict["audio"])
-    response.headers.set('Content-Type', 'audio/mpeg')
-    response.headers.set('Content-Disposition', 'attachment', filename='frida_response.mp3')
-    return response
 
+@app.get("/get_audio/{token}")
+async def get_audio_by_token(token: str):
+    """Serve raw MP3 audio handed out as an ``audio_url``."""
+    if redis_client is None:
+        audio = audio_store.get(token)
+    else:
+        audio = await redis_client.get(audio_key(token))
+    if audio is None:
+        return ORJSONResponse({"error": "Audio not found or expired"}, status_code=404)
+    return Response(audio, media_type="audio/mpeg")
 
-@app.route("/get_response_audio", methods=["POST"])
-def get_response_audio():
+
+@app.post("/get_response_audio")
+async def get_response_audio(request: Request):
     """Alternative endpoint to get audio in WAV format."""
-    data = request.json
+    data = await read_json(request)
+    if data is None:
+        return invalid_body()
     session_id = data.get("session_id", "default")
-    
-    if session_id not in response_threads:
-        return jsonify({"error": "No response found for this session"}), 404
-    
-    _, result_dict = response_threads[session_id]
-    if not result_dict["completed"] or not result_dict["audio"]:
-        return jsonify({"error": "Audio not ready"}), 404
-    
-    # Serve the audio URL (could be modified to serve a WAV file instead)
-    temp_url = f"{serverUrl}/get_audio?session_id={session_id}"
-    return jsonify({"audio_url": temp_url})
+
+    status, result = await get_response_state(session_id)
+    if status is None:
+        return ORJSONResponse(
+            {"error": "No response found for this session"}, status_code=404
+        )
+
+    if status != "completed" or not result[1]:
+        return ORJSONResponse({"error": "Audio not ready"}, status_code=404)
+
+    # Serve a relative audio URL (could be modified to serve a WAV file instead)
+    temp_url = f"/get_audio?session_id={session_id}"
+    return {"audio_url": temp_url}
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     # Use port 5001 by default to avoid conflicts with AirPlay on macOS
     port = int(os.environ.get("PORT", 5001))
-    app.run(host="0.0.0.0", port=port)
+    # Each worker is a separate process with its own event loop; use Redis
+    # (REDIS_URL) so sessions, responses and audio links are shared between them
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    uvicorn.run("frida_server:app", host="0.0.0.0", port=port, workers=workers)
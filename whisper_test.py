@@ -1,15 +1,24 @@
+import atexit
+import hashlib
+import io
 import os
-import wave
+import queue
 import tempfile
-import struct
-import math
 import re
 import time
 import random
-import subprocess
 import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from openai import OpenAI
 import argparse
+import httpx
+import miniaudio
+import numpy as np
+import soundfile as sf
+import tiktoken
 
 # Check for PyAudio availability
 try:
@@ -26,8 +35,23 @@ if not api_key:
         "No API key found. Please set the OPENAI_API_KEY environment variable."
     )
 
-# Initialize the OpenAI client
-client = OpenAI(api_key=api_key)
+# Initialize the OpenAI client. One HTTP/2 connection carries all requests,
+# including the parallel filler TTS, and is kept for five minutes when idle
+# rather than httpx's default five seconds.
+client = OpenAI(
+    api_key=api_key,
+    http_client=httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=300),
+    ),
+)
+
+# The server may still close an idle connection, so the one used for the
+# transcription upload is re-checked ahead of time (see warm_connection)
+WARM_INTERVAL = 30
+KEEPALIVE_INTERVAL = 120  # Refresh the idle connection between turns
+_warming = threading.Lock()
+_last_warm = 0.0
 
 # Frida Kahlo prompt with instructions for shorter responses
 FRIDA_PROMPT = """You are Frida Kahlo, the Mexican painter known for your bold art and emotional insight. 
@@ -52,8 +76,22 @@ FILLER_STATEMENTS = [
     "Un momento, por favor...",
 ]
 
+WELCOME_MESSAGE = "Hola! I am Frida Kahlo. I am here to share my thoughts on art, life, and passion. What would you like to talk about?"
+GOODBYE_MESSAGE = "Adiós, mi querido amigo. Until we meet again in the realm of art and passion."
+INTERRUPTED_GOODBYE_MESSAGE = "Adiós. Our conversation may end, but art is eternal."
+
+# Messages of history sent after the welcome (the last 9 exchanges)
+HISTORY_LENGTH = 18
+
+# Input tokens per request; older exchanges are dropped to stay under it,
+# since time to first token grows with the prompt
+PROMPT_TOKEN_BUDGET = 600
+
+# Seconds to wait for the first audio of a response before playing a filler
+FILLER_DELAY = 0.25
+
 # Model configurations
-CHAT_MODEL = "gpt-3.5-turbo"  # Faster than gpt-4
+CHAT_MODEL = "gpt-4o-mini"  # Faster first token than gpt-3.5-turbo
 TTS_MODEL = "tts-1"
 TTS_VOICE = "shimmer"
 TRANSCRIPTION_MODEL = "whisper-1"
@@ -61,149 +99,317 @@ TRANSCRIPTION_MODEL = "whisper-1"
 # Exit phrases that will end the conversation
 EXIT_PHRASES = ["goodbye", "bye", "exit", "quit", "end conversation", "stop"]
 THANK_PHRASES = ["thank you", "thanks"]
-
-# TTS cache to avoid regenerating common responses
-tts_cache = {}
-filler_audio_files = {}  # Cache for filler statements
-
-
-def get_rms(data, width=2):
-    """Calculate the root mean square of a chunk of audio data."""
-    # Convert binary data to short integers
-    count = len(data) // width
-    format = f"{count}h" if width == 2 else f"{count}B"
-    shorts = struct.unpack(format, data)
-
-    # Calculate RMS
-    sum_squares = sum(s * s for s in shorts)
-    return math.sqrt(sum_squares / count) if count > 0 else 0
-
-
-def record_audio(max_seconds=30, sample_rate=16000):
-    """Record audio from microphone dynamically, stopping when silence is detected."""
-    chunk = 1024
+QUESTION_WORDS = ["what", "why", "how", "when", "where", "who", "can"]
+CONTINUATION_WORDS = ["more", "also", "another", "tell", "about"]
+
+# Where a streamed reply is split into sentences for speech
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+# Matchers for should_exit, compiled once instead of re-parsed on every call
+SENTENCE_SPLIT_RE = re.compile(r"[.!?;]+")
+EXIT_RE = re.compile("|".join(map(re.escape, EXIT_PHRASES)))
+THANK_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, THANK_PHRASES)) + r")\b")
+QUESTION_RE = re.compile(r"\?|(?:" + "|".join(QUESTION_WORDS) + ") ")
+CONTINUATION_RE = re.compile(r"(?<!\S)(?:" + "|".join(CONTINUATION_WORDS) + r")(?!\S)")
+
+# TTS cache to avoid regenerating common phrases, kept on disk across runs
+TTS_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "frida_tts")
+phrase_audio = {}  # Decoded PCM of the welcome, goodbyes and fillers
+
+
+def get_energy(data):
+    """Return the exact sum of squared 16-bit samples in a chunk of audio."""
+    samples = np.frombuffer(data, dtype=np.int16).astype(np.int64)
+    return int(np.dot(samples, samples))
+
+
+# PortAudio and the microphone stream, opened on first use and kept open
+# between turns because initialising PortAudio is slow
+_pyaudio = None
+_input_stream = None
+
+# Chunks handed over by the stream callback, so recording never blocks
+# inside PortAudio. Replaced for each recording to drop stale chunks.
+_input_chunks = queue.SimpleQueue()
+
+
+def _on_input(in_data, frame_count, time_info, status):
+    # Runs on PortAudio's own high-priority audio thread; keep it minimal and
+    # leave the VAD to record_audio. Unlike a blocking read, an input
+    # overflow here is only flagged in status, never raised.
+    _input_chunks.put(in_data)
+    return None, pyaudio.paContinue
+
+
+def open_input_stream(audio_format, channels, sample_rate, chunk):
+    """Return the shared, stopped microphone stream, opening it if needed."""
+    global _pyaudio, _input_stream
+    if _input_stream is None:
+        _pyaudio = pyaudio.PyAudio()
+        _input_stream = _pyaudio.open(
+            format=audio_format,
+            channels=channels,
+            rate=sample_rate,
+            input=True,
+            frames_per_buffer=chunk,
+            start=False,
+            stream_callback=_on_input,
+        )
+        atexit.register(close_input_stream)
+    return _input_stream
+
+
+def close_input_stream():
+    """Close the shared microphone stream and shut down PortAudio."""
+    global _pyaudio, _input_stream
+    if _input_stream is not None:
+        _input_stream.close()
+        _pyaudio.terminate()
+        _pyaudio = _input_stream = None
+
+
+def iter_input_chunks():
+    """Yield microphone chunks as the stream callback delivers them."""
+    chunks = _input_chunks
+    while True:
+        yield chunks.get()
+
+
+def record_audio(
+    max_seconds=30, sample_rate=16000, on_speech_start=None, on_silence_start=None
+):
+    """Record audio from microphone dynamically, stopping when silence is detected.
+
+    Returns the recording as FLAC bytes, or None if no speech was detected.
+
+    ``on_speech_start`` is called once when speech is first detected, e.g. to
+    stop Frida's playback when the user talks over her. ``on_silence_start``
+    is called whenever the user goes quiet, which may be the end of the
+    utterance.
+    """
+    global _input_chunks
+    chunk = 256  # 16 ms, so speech and silence are detected without delay
     audio_format = pyaudio.paInt16
     channels = 1
 
-    # Silence detection parameters
-    threshold = 300  # Lowered from 500 to 300 to detect quieter voices
-    silence_limit = 2.5
+    # Silence detection parameters. Speech must rise to 3x the room's noise
+    # RMS to start a recording and fall below 1.5x to count as silence; the
+    # gap between the two keeps noise from flapping the state. Neither drops
+    # below 300 RMS, so a quiet room behaves as with a fixed threshold.
+    min_threshold = 300  # Speech and silence threshold in a quiet room
+    calibration_chunks = 5  # Initial chunks used to measure the noise floor
+    silence_limit = 0.8
 
-    p = pyaudio.PyAudio()
+    # Thresholds are compared with a chunk's sum of squares, so RMS factors
+    # are squared: rms > t  <=>  energy > t² * samples
+    min_speech_energy = min_threshold * min_threshold * chunk
+    silence_chunks_limit = int(silence_limit * sample_rate / chunk)
 
-    stream = p.open(
-        format=audio_format,
-        channels=channels,
-        rate=sample_rate,
-        input=True,
-        frames_per_buffer=chunk,
-    )
+    stream = open_input_stream(audio_format, channels, sample_rate, chunk)
+    _input_chunks = queue.SimpleQueue()
+    stream.start_stream()
 
     print("Listening... (speak now)")
 
     frames = []
     silent_chunks = 0
     audio_started = False
+    noise_energy = None
+    speech_energy = silence_energy = min_speech_energy
     max_chunks = int(sample_rate / chunk * max_seconds)
 
     # Pre-buffer to avoid cutting off the beginning of speech
-    pre_buffer = []
     num_pre_buffer_chunks = int(0.5 * sample_rate / chunk)  # 0.5 seconds pre-buffer
+    pre_buffer = deque(maxlen=num_pre_buffer_chunks)  # Drops the oldest chunk
 
-    for i in range(0, max_chunks):
-        data = stream.read(chunk)
-
+    for i, data in enumerate(islice(iter_input_chunks(), max_chunks)):
         # Calculate audio energy
-        rms = get_rms(data)
+        energy = get_energy(data)
+
+        # Track the noise floor: average the first chunks, then follow it
+        # slowly through quiet chunks only
+        if i < calibration_chunks:
+            noise_energy = (noise_energy or 0) + energy / calibration_chunks
+        elif energy < silence_energy:
+            noise_energy = 0.95 * noise_energy + 0.05 * energy
+        speech_energy = max(9 * noise_energy, min_speech_energy)
+        silence_energy = max(speech_energy / 4, min_speech_energy)
 
         # If not started speaking yet, fill pre-buffer
         if not audio_started:
             pre_buffer.append(data)
-            # Keep pre-buffer size limited
-            if len(pre_buffer) > num_pre_buffer_chunks:
-                pre_buffer.pop(0)
 
             # Check if speaking has started
-            if rms > threshold:
+            if i >= calibration_chunks and energy > speech_energy:
                 audio_started = True
                 frames.extend(pre_buffer)  # Add pre-buffer to frames
                 frames.append(data)
                 print("Speech detected, recording...")
                 silent_chunks = 0
+                if on_speech_start:
+                    on_speech_start()
         else:
             # Speech already started, so add this chunk to frames
             frames.append(data)
 
-            # Check for silence
-            if rms < threshold:
-                silent_chunks += 1
-                silence_duration = silent_chunks * chunk / sample_rate
-                if silence_duration >= silence_limit:
-                    print("Silence detected, stopping recording.")
-                    break
-            else:
-                silent_chunks = 0
+            # Count consecutive silent chunks, resetting on anything louder
+            silent_chunks = (silent_chunks + 1) * (energy < silence_energy)
+            if silent_chunks == 1 and on_silence_start:
+                on_silence_start()
+            if silent_chunks >= silence_chunks_limit:
+                print("Silence detected, stopping recording.")
+                break
 
     stream.stop_stream()
-    stream.close()
-    p.terminate()
 
     # If no speech was detected at all
     if not audio_started:
         print("No speech detected.")
         return None
 
-    # Create a temporary file to store the recording
-    temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+    # Encode in memory as lossless FLAC, about half the size of a WAV, so the
+    # upload to Whisper is smaller and no temp file is needed
+    samples = np.frombuffer(b"".join(frames), dtype=np.int16).reshape(-1, channels)
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, sample_rate, format="FLAC", subtype="PCM_16")
+
+    return buffer.getvalue()
+
 
-    # Save the recording as a WAV file
-    with wave.open(temp_file.name, "wb") as wf:
-        wf.setnchannels(channels)
-        wf.setsampwidth(p.get_sample_size(audio_format))
-        wf.setframerate(sample_rate)
-        wf.writeframes(b"".join(frames))
+def _warm():
+    global _last_warm
+    try:
+        # Any small request leaves a keep-alive connection in the pool
+        client.models.retrieve(TRANSCRIPTION_MODEL)
+        _last_warm = time.time()
+    except Exception:
+        pass
+    finally:
+        _warming.release()
 
-    return temp_file.name
 
+def warm_connection():
+    """Open the connection to OpenAI in a background thread.
+
+    Called at startup and when the user may have stopped talking, so the
+    TCP and TLS handshakes overlap other work instead of delaying the next
+    request.
+    """
+    if time.time() - _last_warm < WARM_INTERVAL:
+        return
+    if _warming.acquire(blocking=False):
+        threading.Thread(target=_warm, daemon=True).start()
 
-def get_frida_response(user_text, conversation_history=None):
-    """Generate a response as Frida Kahlo."""
-    if conversation_history is None:
-        conversation_history = []
 
-    # Keep conversation history limited to last 10 exchanges to maintain speed
-    if len(conversation_history) > 20:
-        # Keep the first exchange (welcome) and the last 9 exchanges
-        conversation_history = [conversation_history[0]] + conversation_history[-18:]
+def keep_connection_warm():
+    """Refresh the connection to OpenAI every KEEPALIVE_INTERVAL seconds.
 
-    messages = [{"role": "system", "content": FRIDA_PROMPT}]
-    messages.extend(conversation_history)
-    messages.append({"role": "user", "content": user_text})
+    Runs forever, so start it on a daemon thread. Chat, TTS and transcription
+    share one HTTP/2 connection to the same host, so one request keeps all
+    three warm.
+    """
+    while True:
+        time.sleep(KEEPALIVE_INTERVAL)
+        warm_connection()
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model):
+    """Return the tokenizer for a chat model."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(message, encoding):
+    """Count the prompt tokens of a chat message, including its framing."""
+    return len(encoding.encode(message["content"])) + 4
+
+
+def get_frida_response(user_text, conversation_history=None, on_sentence=None):
+    """Generate a response as Frida Kahlo.
+
+    The reply is streamed, and each sentence is passed to ``on_sentence`` as
+    soon as it is complete, so its speech can start before the rest arrives.
+    Exchanges dropped to fit PROMPT_TOKEN_BUDGET are removed from
+    ``conversation_history``.
+    """
+    if conversation_history is None:
+        conversation_history = deque()
+
+    # The welcome is always sent first, even if it wasn't played, to give
+    # the model context; the history itself is bounded (see HISTORY_LENGTH)
+    pinned = [
+        {"role": "system", "content": FRIDA_PROMPT},
+        {"role": "assistant", "content": WELCOME_MESSAGE},
+    ]
+    user_message = {"role": "user", "content": user_text}
+
+    # Drop the oldest exchanges from the history until the prompt fits the
+    # token budget
+    encoding = get_encoding(CHAT_MODEL)
+    history_tokens = deque(count_tokens(m, encoding) for m in conversation_history)
+    total = sum(count_tokens(m, encoding) for m in (*pinned, user_message))
+    total += sum(history_tokens)
+    while conversation_history and total > PROMPT_TOKEN_BUDGET:
+        for _ in range(min(2, len(conversation_history))):
+            conversation_history.popleft()
+            total -= history_tokens.popleft()
+
+    messages = [*pinned, *conversation_history, user_message]
 
     # Show progress during API call
     print("Thinking", end="", flush=True)
     start_time = time.time()
 
-    response = client.chat.completions.create(
+    stream = client.chat.completions.create(
         model=CHAT_MODEL,
         messages=messages,
         max_tokens=150,  # Limit token count for shorter responses
+        stream=True,
     )
 
+    parts = []
+    pending = ""
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if not delta:
+            continue
+        parts.append(delta)
+        *sentences, pending = SENTENCE_BOUNDARY.split(pending + delta)
+        if on_sentence:
+            for sentence in sentences:
+                on_sentence(sentence)
+    if on_sentence and pending.strip():
+        on_sentence(pending.strip())
+
     elapsed = time.time() - start_time
     print(f" ({elapsed:.1f}s)")
 
-    return response.choices[0].message.content
+    return "".join(parts).strip()
 
 
-def text_to_speech(text, use_cache=True):
-    """Convert text to speech using OpenAI's API."""
-    # Check if we have this text cached
-    if use_cache and text in tts_cache:
-        print("Using cached TTS audio")
-        return tts_cache[text]
+def tts_cache_path(text):
+    """Return the disk cache path for a text's speech with the current voice."""
+    key = f"{TTS_MODEL}|{TTS_VOICE}|{text}".encode("utf-8")
+    return os.path.join(TTS_CACHE_DIR, f"{hashlib.sha1(key).hexdigest()}.mp3")
+
 
-    print("Converting to speech (OpenAI)", end="", flush=True)
+def text_to_speech(text, verbose=True):
+    """Convert text to speech using OpenAI's API.
+
+    Returns the path of an MP3 file, cached for later runs.
+    """
+    # Check if we have this text cached
+    output_file = tts_cache_path(text)
+    if os.path.exists(output_file):
+        if verbose:
+            print("Using cached TTS audio")
+        return output_file
+
+    if verbose:
+        print("Converting to speech (OpenAI)", end="", flush=True)
     start_time = time.time()
 
     response = client.audio.speech.create(
@@ -211,61 +417,264 @@ def text_to_speech(text, use_cache=True):
     )
 
     elapsed = time.time() - start_time
-    print(f" ({elapsed:.1f}s)")
-
-    # Cache the result
-    if use_cache:
-        tts_cache[text] = response.content
-
-    # Save to a temporary file
-    output_file = f"frida_speech_{hash(text) % 10000}.mp3"
-    with open(output_file, "wb") as f:
+    if verbose:
+        print(f" ({elapsed:.1f}s)")
+
+    # Cache the result; write then rename so that concurrent callers and
+    # interrupted runs never see a partial file
+    os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=TTS_CACHE_DIR)
+    with os.fdopen(fd, "wb") as f:
         f.write(response.content)
+    os.replace(temp_path, output_file)
 
     return output_file
 
 
-def prepare_filler_statements(all_temp_files):
-    """Pre-generate audio for filler statements."""
-    print("Preparing filler statements...")
+def prepare_phrases():
+    """Pre-generate and decode audio for the welcome, goodbyes and fillers.
 
-    for statement in FILLER_STATEMENTS:
-        filler_file = text_to_speech(statement)
-        filler_audio_files[statement] = filler_file
-        all_temp_files.add(filler_file)
+    Decoding once here keeps MP3 decoding out of the time between the
+    transcription and the filler reaching the speaker.
+    """
+    print("Preparing filler statements", end="", flush=True)
+    start_time = time.time()
 
-    print(f"Prepared {len(filler_audio_files)} filler statements")
+    phrases = [
+        WELCOME_MESSAGE,
+        GOODBYE_MESSAGE,
+        INTERRUPTED_GOODBYE_MESSAGE,
+        *FILLER_STATEMENTS,
+    ]
+
+    # The TTS calls just wait on the network, so threads overlap them
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        pcms = pool.map(
+            lambda text: decode_audio(text_to_speech(text, verbose=False)),
+            phrases,
+        )
+        phrase_audio.update(zip(phrases, pcms))
+
+    elapsed = time.time() - start_time
+    print(f" ({elapsed:.1f}s)")
+    print(f"Prepared {len(FILLER_STATEMENTS)} filler statements")
+
+
+def stream_speech(text, playback):
+    """Synthesize text as raw PCM, feeding it to playback as it arrives."""
+    with client.audio.speech.with_streaming_response.create(
+        model=TTS_MODEL, voice=TTS_VOICE, input=text, response_format="pcm"
+    ) as response:
+        # Chunk boundaries can split a sample; carry the odd byte over
+        pending = b""
+        for chunk in response.iter_bytes(4096):
+            # Stop downloading once the user has talked over the playback
+            if playback.finished.is_set():
+                break
+            chunk = pending + chunk
+            whole = len(chunk) - len(chunk) % 2
+            playback.feed(chunk[:whole])
+            pending = chunk[whole:]
+
+
+def speak_sentences(sentences, playback):
+    """Stream speech for sentences from a queue into playback, in order.
+
+    A None in the queue ends the reply and closes the playback.
+    """
+    try:
+        for sentence in iter(sentences.get, None):
+            # Skip the rest of a reply the user has talked over
+            if not playback.finished.is_set():
+                stream_speech(sentence, playback)
+    finally:
+        playback.close()
 
 
-def play_filler_statement():
+def play_phrase(text, wait=True):
+    """Play a phrase prepared by prepare_phrases."""
+    return play_pcm(phrase_audio[text], wait)
+
+
+def play_filler_statement(wait=True):
     """Play a random filler statement."""
-    if not filler_audio_files:
-        return
+    if not phrase_audio:
+        return None
 
-    filler = random.choice(list(filler_audio_files.keys()))
-    audio_file = filler_audio_files[filler]
+    filler = random.choice(FILLER_STATEMENTS)
 
     print(f"Frida (filler): {filler}")
-    play_audio(audio_file)
+    return play_phrase(filler, wait)
+
+
+class Playback:
+    """Audio playing on the shared output device.
+
+    16-bit PCM is fed in as it becomes available and played in order;
+    ``close`` marks the end of the audio. ``has_audio`` is set once there is
+    something to play, or once it is clear there never will be.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._chunks = deque()
+        self._offset = 0  # Bytes of the first chunk already played
+        self._closed = False
+        self._stopped = False
+        self.has_audio = threading.Event()
+        self.finished = threading.Event()
+
+    def feed(self, pcm):
+        with self._lock:
+            # Audio still arriving for a stopped playback is never played
+            if self._stopped:
+                return
+            self._chunks.append(pcm)
+        self.has_audio.set()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self.has_audio.set()
+
+    def stop(self):
+        with self._lock:
+            self._chunks.clear()
+            self._closed = True
+            self._stopped = True
+        self.has_audio.set()
+        self.finished.set()
+
+    def wait(self, timeout=None):
+        """Wait until everything fed has played; returns whether it has."""
+        return self.finished.wait(timeout)
+
+    def read(self, size):
+        """Return up to ``size`` bytes of PCM for the output device."""
+        out = bytearray()
+        with self._lock:
+            while self._chunks and len(out) < size:
+                chunk = self._chunks[0]
+                piece = chunk[self._offset : self._offset + size - len(out)]
+                out += piece
+                self._offset += len(piece)
+                if self._offset == len(chunk):
+                    self._chunks.popleft()
+                    self._offset = 0
+            if self._closed and not self._chunks:
+                self.finished.set()
+        return bytes(out)
+
+
+# Audio output, opened on first use and kept running so playback starts
+# without spawning a player process or re-initialising the device each time.
+# It plays one Playback at a time, and silence in between.
+PLAYBACK_RATE = 24000  # OpenAI TTS audio is 24 kHz mono
+_output_device = None
+_current_playback = None
+
+
+def _playback_frames():
+    # Generator protocol of miniaudio: receives the number of frames wanted
+    frames = yield b""
+    while True:
+        playback = _current_playback
+        frames = yield playback.read(frames * 2) if playback else b""
+
+
+def open_output_device():
+    """Return the shared output device, starting it if needed."""
+    global _output_device
+    if _output_device is None:
+        _output_device = miniaudio.PlaybackDevice(
+            output_format=miniaudio.SampleFormat.SIGNED16,
+            nchannels=1,
+            sample_rate=PLAYBACK_RATE,
+            buffersize_msec=50,
+        )
+        frames = _playback_frames()
+        next(frames)
+        _output_device.start(frames)
+        atexit.register(close_output_device)
+    return _output_device
+
+
+def close_output_device():
+    """Stop and close the shared output device."""
+    global _output_device
+    if _output_device is not None:
+        _output_device.close()
+        _output_device = None
+
+
+def start_playback(playback=None):
+    """Play ``playback`` (a new one by default), replacing whatever the
+    device is playing, and return it."""
+    global _current_playback
+    open_output_device()
+    stop_audio(_current_playback)
+    _current_playback = playback or Playback()
+    return _current_playback
+
+
+def decode_audio(audio_file_path):
+    """Decode an audio file to 16-bit PCM at the playback rate."""
+    decoded = miniaudio.decode_file(
+        audio_file_path,
+        output_format=miniaudio.SampleFormat.SIGNED16,
+        nchannels=1,
+        sample_rate=PLAYBACK_RATE,
+    )
+    return decoded.samples.tobytes()
+
+
+def play_pcm(pcm, wait=True):
+    """Play 16-bit PCM at the playback rate on the shared output device.
+
+    Returns the Playback; with ``wait=False`` it plays in the background.
+    """
+    playback = start_playback()
+    playback.feed(pcm)
+    playback.close()
+    if wait:
+        playback.wait()
+    return playback
 
 
-def play_audio(audio_file_path):
-    """Play audio file using macOS afplay."""
-    os.system(f"afplay {audio_file_path}")
+def stop_audio(playback):
+    """Stop a background playback if it is still running."""
+    if playback is not None:
+        playback.stop()
 
 
 def generate_response_in_background(user_text, conversation_history):
-    """Generate Frida's response and TTS in a background thread."""
-    response_result = {"response": None, "audio_file": None}
+    """Generate Frida's response and TTS in background threads.
 
-    def generate():
-        # Generate the text response
-        response = get_frida_response(user_text, conversation_history)
-        response_result["response"] = response
+    Each sentence is spoken as soon as the chat stream completes it, and its
+    speech streams into ``response_result["playback"]``. The playback is not
+    started, so the caller decides when it goes to the speaker. The returned
+    thread finishes once the reply's text is complete.
+    """
+    response_result = {"response": None, "playback": Playback()}
+
+    # Sentences go to a second thread that synthesizes them one after
+    # another; speech streams faster than it plays, so it stays ahead
+    sentences = queue.Queue()
+    threading.Thread(
+        target=speak_sentences,
+        args=(sentences, response_result["playback"]),
+        daemon=True,
+    ).start()
 
-        # Convert to speech
-        audio_file = text_to_speech(response)
-        response_result["audio_file"] = audio_file
+    def generate():
+        try:
+            # Generate the text response; replies rarely repeat, so their
+            # speech isn't cached
+            response_result["response"] = get_frida_response(
+                user_text, conversation_history, on_sentence=sentences.put
+            )
+        finally:
+            sentences.put(None)
 
     thread = threading.Thread(target=generate)
     thread.daemon = True
@@ -281,7 +690,7 @@ def should_exit(text):
     text_lower = text.lower().strip()
 
     # First split into sentences to handle multi-part messages
-    sentences = re.split(r"[.!?;]+", text_lower)
+    sentences = SENTENCE_SPLIT_RE.split(text_lower)
 
     # For each sentence, check if it contains exit intent
     for sentence in sentences:
@@ -290,28 +699,21 @@ def should_exit(text):
             continue
 
         # 1. Direct exit phrase matches
-        if any(exit_phrase == sentence for exit_phrase in EXIT_PHRASES):
+        if EXIT_RE.fullmatch(sentence):
             return True
 
         # 2. If the sentence contains a question, don't consider it an exit
         # This helps with cases like "Can you tell me about your art? Thanks."
-        if "?" in sentence or any(
-            q_word + " " in sentence
-            for q_word in ["what", "why", "how", "when", "where", "who", "can"]
-        ):
+        if QUESTION_RE.search(sentence):
             continue
 
         # 3. Check for standalone thank phrases - only at the end of the conversation
         # Be cautious with "thanks" - only consider it exit if it's:
         # - Very short sentence (≤ 4 words)
         # - AND doesn't ask for more info
-        words = sentence.split()
-        if len(words) <= 4 and any(
-            thank_phrase in sentence for thank_phrase in THANK_PHRASES
-        ):
+        if len(sentence.split()) <= 4 and THANK_RE.search(sentence):
             # Make sure it doesn't contain words suggesting continuation
-            continuation_words = ["more", "also", "another", "tell", "about"]
-            if not any(cont_word in words for cont_word in continuation_words):
+            if not CONTINUATION_RE.search(sentence):
                 # If it looks like a standalone thanks, it could be an exit
                 return True
 
@@ -319,56 +721,56 @@ def should_exit(text):
     return False
 
 
-def main(skip_welcome=False):
+def main(skip_welcome=False, barge_in=False):
     print("===== Frida Kahlo Conversation =====")
     print(
         "Speak to Frida! Say something like 'goodbye' or 'thank you' to end the conversation."
     )
     print(f"Using OpenAI TTS with voice '{TTS_VOICE}'")
 
-    conversation_history = []
+    # Only the most recent messages are kept, so trimming costs nothing
+    conversation_history = deque(maxlen=HISTORY_LENGTH)
 
-    # Keep track of all temporary files
-    all_temp_files = set()
+    # Connect while the phrases load; once they are cached on disk the first
+    # request would otherwise be the first transcription
+    warm_connection()
+    threading.Thread(target=keep_connection_warm, daemon=True).start()
 
-    # Pre-generate filler audio files
-    prepare_filler_statements(all_temp_files)
+    # Pre-generate the fixed phrases (cached on disk after the first run)
+    prepare_phrases()
 
     # Initial welcome message from Frida
-    welcome_message = "Hola! I am Frida Kahlo. I am here to share my thoughts on art, life, and passion. What would you like to talk about?"
-    welcome_file = None
-
     if not skip_welcome:
-        print("\nFrida:", welcome_message)
-
-        # Convert welcome to speech
-        welcome_file = text_to_speech(welcome_message)
-        all_temp_files.add(welcome_file)
+        print("\nFrida:", WELCOME_MESSAGE)
 
         print("Playing welcome...")
-        play_audio(welcome_file)
+        play_phrase(WELCOME_MESSAGE)
     else:
         print("\nSkipping welcome message. Ready to listen...")
 
-    # Add Frida's welcome to conversation history regardless
-    # This helps the model maintain context even if we don't play it
-    conversation_history.append({"role": "assistant", "content": welcome_message})
-
     # Main conversation loop
-    audio_file_path = None
+    playback = None  # Frida's last response, playing while we listen
 
     try:
         while True:
             # Start transcription immediately after recording to reduce wait time
             print("\n---------------------------")
 
-            # Record audio from microphone
-            audio_file_path = record_audio(max_seconds=30)
-            if audio_file_path:
-                all_temp_files.add(audio_file_path)
+            # Through speakers the microphone hears Frida, so only listen
+            # once she has finished unless barge-in was asked for
+            if not barge_in and playback is not None:
+                playback.wait()
+
+            # Record audio from microphone; with barge-in, speaking over
+            # Frida cuts her off
+            recording = record_audio(
+                max_seconds=30,
+                on_speech_start=(lambda: stop_audio(playback)) if barge_in else None,
+                on_silence_start=warm_connection,
+            )
 
             # If no speech was detected, continue listening
-            if audio_file_path is None:
+            if recording is None:
                 print("No speech detected. Please try again.")
                 continue
 
@@ -376,110 +778,93 @@ def main(skip_welcome=False):
             print("Transcribing...", end="", flush=True)
             start_time = time.time()
 
-            with open(audio_file_path, "rb") as audio_file:
-                transcript = client.audio.transcriptions.create(
-                    model=TRANSCRIPTION_MODEL, file=audio_file
-                )
+            transcript = client.audio.transcriptions.create(
+                model=TRANSCRIPTION_MODEL,
+                file=("audio.flac", recording, "audio/flac"),
+            )
 
             elapsed = time.time() - start_time
             print(f" ({elapsed:.1f}s)")
 
-            # Clean up audio file immediately after use
-            if audio_file_path and os.path.exists(audio_file_path):
-                os.remove(audio_file_path)
-                all_temp_files.discard(audio_file_path)
-                audio_file_path = None
-
             user_text = transcript.text
             print("\nYou said:", user_text)
 
             # Check if the conversation should end
             if should_exit(user_text):
-                goodbye_message = "Adiós, mi querido amigo. Until we meet again in the realm of art and passion."
-                print("\nFrida:", goodbye_message)
-
-                # Convert goodbye to speech and play it
-                goodbye_file = text_to_speech(goodbye_message)
-                all_temp_files.add(goodbye_file)
+                print("\nFrida:", GOODBYE_MESSAGE)
 
                 print("Playing goodbye...")
-                play_audio(goodbye_file)
+                play_phrase(GOODBYE_MESSAGE)
                 break
 
-            # Add user message to conversation history
-            conversation_history.append({"role": "user", "content": user_text})
-
             # Start generating response in background
             thread, response_result = generate_response_in_background(
                 user_text, conversation_history
             )
 
-            # Play a filler statement while generating
-            play_filler_statement()
-
-            # If response generation is still ongoing, wait for it to complete
-            if thread.is_alive():
+            # Give a fast response a moment to arrive; otherwise play a
+            # filler statement until the first audio of the response does
+            response_playback = response_result["playback"]
+            if not response_playback.has_audio.wait(FILLER_DELAY):
+                play_filler_statement(wait=False)
                 print("Waiting for response generation to complete...")
-                thread.join()
+                response_playback.has_audio.wait()
 
-            # Get the generated response
-            frida_response = response_result["response"]
-            audio_file = response_result["audio_file"]
+            # Play the audio response, cutting the filler short; with
+            # barge-in it keeps playing while we listen for the next turn
+            print("Playing response...")
+            playback = start_playback(response_playback)
 
-            # Add to temp files list
-            if audio_file:
-                all_temp_files.add(audio_file)
+            # The full text follows shortly after the first sentence
+            thread.join()
+            frida_response = response_result["response"]
+            if frida_response is None:
+                print("Sorry, no response could be generated.")
+                continue
 
             print("Frida:", frida_response)
 
-            # Add Frida's response to conversation history
-            conversation_history.append(
-                {"role": "assistant", "content": frida_response}
+            # Add the exchange to conversation history
+            conversation_history.extend(
+                (
+                    {"role": "user", "content": user_text},
+                    {"role": "assistant", "content": frida_response},
+                )
             )
 
-            # Play the audio response
-            if audio_file:
-                print("Playing response...")
-                play_audio(audio_file)
-
     except KeyboardInterrupt:
         print("\nEnding conversation...")
+        stop_audio(playback)
 
         # Say goodbye even if user interrupts
         try:
-            goodbye_message = "Adiós. Our conversation may end, but art is eternal."
-            print("\nFrida:", goodbye_message)
-
-            # Convert to speech and play
-            goodbye_file = text_to_speech(goodbye_message)
-            all_temp_files.add(goodbye_file)
+            print("\nFrida:", INTERRUPTED_GOODBYE_MESSAGE)
 
             print("Playing goodbye...")
-            play_audio(goodbye_file)
+            play_phrase(INTERRUPTED_GOODBYE_MESSAGE)
         except Exception as e:
             print(f"Error playing goodbye: {e}")
 
     finally:
-        # Clean up all temporary files
-        for file_path in all_temp_files:
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except Exception as e:
-                    print(f"Error removing file {file_path}: {e}")
+        stop_audio(playback)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Chat with Frida Kahlo")
     parser.add_argument(
         "--model",
-        choices=["gpt-4", "gpt-3.5-turbo"],
+        choices=["gpt-4o-mini", "gpt-4", "gpt-3.5-turbo"],
         default=CHAT_MODEL,
         help="Model to use for responses (default: %(default)s)",
     )
     parser.add_argument(
         "--skip-welcome", action="store_true", help="Skip the welcome message"
     )
+    parser.add_argument(
+        "--barge-in",
+        action="store_true",
+        help="Listen while Frida speaks so you can interrupt her (use headphones)",
+    )
     parser.add_argument(
         "--tts-voice",
         choices=["alloy", "echo", "fable", "onyx", "nova", "shimmer"],
@@ -495,4 +880,4 @@ if __name__ == "__main__":
     if args.tts_voice:
         TTS_VOICE = args.tts_voice
 
-    main(skip_welcome=args.skip_welcome)
+    main(skip_welcome=args.skip_welcome, barge_in=args.barge_in)